@@ -23,6 +23,10 @@ class DatabaseManager:
         try:
             self.conn = sqlite3.connect(self.db_path)
             self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA cache_size=-64000")
             print(f"✅ 已連接到數據庫: {self.db_path}")
             return True
         except Exception as e:
@@ -99,21 +103,28 @@ class DatabaseManager:
         print("="*50 + "\n")
     
     def backup_database(self, backup_dir="/app/data/backups"):
-        """備份數據庫"""
+        """備份數據庫（使用 SQLite 線上備份 API，包含尚未 checkpoint 的 WAL 內容）"""
         try:
             Path(backup_dir).mkdir(parents=True, exist_ok=True)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = os.path.join(backup_dir, f"rental_{timestamp}.db")
             
+            # 尚未連線時開啟暫時連線作為備份來源（檔案不存在時不自動建立）
             if self.conn:
-                self.conn.close()
+                src = self.conn
+            else:
+                src = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=rw", uri=True)
+            
+            # 逐頁複製到備份檔，備份期間不需關閉連線
+            dst = sqlite3.connect(backup_path)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                if src is not self.conn:
+                    src.close()
             
-            # 複製數據庫文件
-            import shutil
-            shutil.copy2(self.db_path, backup_path)
-            
-            self.connect()
             print(f"✅ 數據庫已備份到: {backup_path}")
             return backup_path
         except Exception as e:
@@ -149,20 +160,28 @@ class DatabaseManager:
             print("❌ 未連接到數據庫")
             return False
         
+        # 優先使用 orjson（較快），未安裝時退回標準 json
+        try:
+            import orjson
+            dumps = lambda row: orjson.dumps(row, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except ImportError:
+            dumps = lambda row: json.dumps(row, ensure_ascii=False, indent=2)
+        
         try:
             cursor = self.conn.cursor()
             cursor.execute("SELECT * FROM properties WHERE status = 'active'")
-            columns = [description[0] for description in cursor.description]
-            rows = cursor.fetchall()
-            
-            data = []
-            for row in rows:
-                data.append(dict(zip(columns, row)))
             
+            # 逐筆寫出，不一次載入全部資料；每筆再縮排一層，格式與 json.dump(indent=2) 相同
+            count = 0
             with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            print(f"✅ 已導出 {len(data)} 條房源到: {output_file}")
+                f.write('[')
+                for row in cursor:
+                    f.write(',\n  ' if count else '\n  ')
+                    f.write(dumps(dict(row)).replace('\n', '\n  '))
+                    count += 1
+                f.write('\n]' if count else ']')
+            
+            print(f"✅ 已導出 {count} 條房源到: {output_file}")
             return True
         except Exception as e:
             print(f"❌ 導出失敗: {e}")
@@ -12,18 +12,40 @@ import os
 import re
 import time
 import hashlib
+import queue
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Optional
 import math
+import numpy as np
 import pandas as pd
 from io import BytesIO
 
+# JSON 回應：優先使用 orjson 序列化（較快），未安裝時使用標準 JSONResponse
+try:
+    import orjson
+    
+    class FastJSONResponse(JSONResponse):
+        """以 orjson 序列化的 JSON 回應"""
+        
+        def render(self, content) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    FastJSONResponse = JSONResponse
+
 # 初始化 FastAPI
-app = FastAPI(title="租屋行情分析 API v8.1 (Fixed)")
+app = FastAPI(title="租屋行情分析 API v8.1 (Fixed)", default_response_class=FastJSONResponse)
 
 # 添加 CORS 中間件
 app.add_middleware(
@@ -34,9 +56,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 壓縮較大的回應（analysis_v4 會回傳完整房源列表）
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # 數據庫路徑
 DB_PATH = os.path.join(os.path.dirname(__file__), "rental.db")
 
+# 連線池：多個讀取連線 + 單一寫入連線（WAL 模式下讀取不會阻擋寫入）
+READ_POOL_SIZE = 4
+_read_pool = queue.Queue(maxsize=READ_POOL_SIZE)
+_write_conn = None
+_write_lock = threading.Lock()
+
+def _open_conn() -> sqlite3.Connection:
+    """開啟數據庫連線並套用效能設定（WAL、synchronous=NORMAL、大型快取）"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # 可用欄位名稱存取，也相容索引存取
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+@contextmanager
+def get_conn(write: bool = False):
+    """
+    從連線池取得數據庫連線
+    - write=False：從讀取連線池借用，用完歸還
+    - write=True：取得唯一的寫入連線（以鎖序列化），區塊結束時自動 commit，發生例外則 rollback
+    """
+    global _write_conn
+    
+    if write:
+        with _write_lock:
+            if _write_conn is None:
+                _write_conn = _open_conn()
+            try:
+                yield _write_conn
+                _write_conn.commit()
+            except Exception:
+                _write_conn.rollback()
+                raise
+        return
+    
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = _open_conn()
+    try:
+        yield conn
+    finally:
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
 # Upload 資料夾路徑
 UPLOAD_DIR = None
 
@@ -44,6 +119,65 @@ UPLOAD_DIR = None
 CACHE_DIR = os.path.join(os.path.dirname(__file__), "csv_cache")
 CACHE_EXPIRY_HOURS = 24  # 快取過期時間（小時）
 
+# 分析結果快取（以查詢參數為鍵，重新掃描 CSV 後自動失效）
+ANALYSIS_CACHE_TTL_SECONDS = 300
+ANALYSIS_CACHE_MAX_ENTRIES = 512
+_analysis_cache = OrderedDict()  # {key: (建立時間, JSON bytes)}
+_analysis_cache_lock = threading.Lock()
+_data_version = 0  # 每次重建索引後遞增，舊版本的結果不會被寫回快取
+
+def get_cached_analysis(key: tuple) -> Optional[bytes]:
+    """取得未過期的分析結果（已序列化的 JSON）"""
+    with _analysis_cache_lock:
+        entry = _analysis_cache.get(key)
+        if entry is None:
+            return None
+        created_at, body = entry
+        if time.time() - created_at > ANALYSIS_CACHE_TTL_SECONDS:
+            del _analysis_cache[key]
+            return None
+        _analysis_cache.move_to_end(key)
+        return body
+
+def set_cached_analysis(key: tuple, body: bytes):
+    """儲存分析結果，超過上限時淘汰最久未使用的項目"""
+    with _analysis_cache_lock:
+        if key[0] != _data_version:
+            return
+        _analysis_cache[key] = (time.time(), body)
+        _analysis_cache.move_to_end(key)
+        while len(_analysis_cache) > ANALYSIS_CACHE_MAX_ENTRIES:
+            _analysis_cache.popitem(last=False)
+
+def invalidate_analysis_cache():
+    """資料變更後清除分析結果快取"""
+    global _data_version
+    with _analysis_cache_lock:
+        _data_version += 1
+        _analysis_cache.clear()
+
+# 已處理房源快照（CSV 只在檔案變更或重新掃描後重新解析）
+_property_snapshot = {}  # {來源鍵: (簽章, 房源列表)}
+_property_snapshot_lock = threading.Lock()
+
+def get_snapshot_properties(key: tuple, signature) -> Optional[List[dict]]:
+    """取得快照中的房源（回傳副本，呼叫端可自由修改狀態欄位）"""
+    with _property_snapshot_lock:
+        entry = _property_snapshot.get(key)
+    if entry is None or entry[0] != signature:
+        return None
+    return [dict(p) for p in entry[1]]
+
+def set_snapshot_properties(key: tuple, signature, properties: List[dict]):
+    """儲存處理後的房源快照（存副本，避免後續狀態計算改到快照內容）"""
+    with _property_snapshot_lock:
+        _property_snapshot[key] = (signature, [dict(p) for p in properties])
+
+def invalidate_property_snapshot():
+    """清除房源快照"""
+    with _property_snapshot_lock:
+        _property_snapshot.clear()
+
 def get_cache_path(file_id: str) -> str:
     """根據 file_id 生成快取檔案路徑"""
     return os.path.join(CACHE_DIR, f"{file_id}.csv")
@@ -177,7 +311,7 @@ def download_file_from_drive(file_id: str, filename: str) -> Optional[pd.DataFra
     cache_path = get_cache_path(file_id)
     if is_cache_valid(cache_path):
         try:
-            df = pd.read_csv(cache_path, encoding='utf-8-sig')
+            df = read_csv_file(cache_path)
             print(f"  ✓ 從快取載入: {filename} ({len(df)} 筆)")
             return df
         except Exception as e:
@@ -202,7 +336,7 @@ def download_file_from_drive(file_id: str, filename: str) -> Optional[pd.DataFra
             f.write(file_content.read())
         
         # 重新讀取並返回 DataFrame
-        df = pd.read_csv(cache_path, encoding='utf-8-sig')
+        df = read_csv_file(cache_path)
         print(f"  ✓ 從 Google Drive 下載並快取: {filename} ({len(df)} 筆)")
         return df
         
@@ -232,10 +366,6 @@ def get_csv_from_drive(city: str, district: str, building_type: str, property_ca
         return None
     
     try:
-        # 從數據庫查詢匹配的檔案
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # 轉換建物類型格式
         bt_db = building_type
         if building_type == '公寓':
@@ -273,9 +403,11 @@ def get_csv_from_drive(city: str, district: str, building_type: str, property_ca
             query += " AND property_category = ?"
             params.append(property_category)
         
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        # 從數據庫查詢匹配的檔案
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            results = cursor.fetchall()
         
         print(f"  📂 查詢 Google Drive: city={city}, district={district}, bt={bt_db}, cat={property_category}, week={week_id}")
         print(f"     找到 {len(results)} 個匹配的檔案")
@@ -304,47 +436,70 @@ def get_csv_from_drive(city: str, district: str, building_type: str, property_ca
         traceback.print_exc()
         return None
 
+# 每個批次請求最多合併的 files().list 呼叫數（Drive API 上限為 100）
+DRIVE_BATCH_SIZE = 100
+
 def list_google_drive_files(folder_id: str, path: str = "") -> list:
-    """遞迴列出 Google Drive 資料夾中的所有 CSV 檔案"""
+    """列出 Google Drive 資料夾（含所有子資料夾）中的所有 CSV 檔案
+    
+    逐層展開資料夾，同一層的資料夾以 BatchHttpRequest 合併為一次 HTTP 請求
+    """
     if not drive_available or not drive_service:
         return []
     
     files_found = []
+    pending = [(folder_id, path, None)]  # (資料夾 ID, 路徑, 分頁 token)
     
-    try:
-        # 列出資料夾中的所有項目
-        results = drive_service.files().list(
-            q=f"'{folder_id}' in parents and trashed=false",
-            spaces='drive',
-            fields='files(id, name, mimeType)',
-            pageSize=1000
-        ).execute()
-        
-        items = results.get('files', [])
-        
-        for item in items:
-            item_name = item['name']
-            item_id = item['id']
-            item_type = item['mimeType']
-            current_path = f"{path}/{item_name}" if path else item_name
+    def make_callback(listed_id, folder_path, next_pending):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                print(f"⚠️ 列出 Google Drive 資料夾失敗 ({folder_path}): {exception}")
+                return
             
-            if item_type == 'application/vnd.google-apps.folder':
-                # 遞迴進入子資料夾
-                sub_files = list_google_drive_files(item_id, current_path)
-                files_found.extend(sub_files)
-            elif item_name.endswith('.csv'):
-                # 找到 CSV 檔案
-                files_found.append({
-                    'id': item_id,
-                    'name': item_name,
-                    'path': current_path
-                })
-        
-        return files_found
+            for item in response.get('files', []):
+                item_name = item['name']
+                current_path = f"{folder_path}/{item_name}" if folder_path else item_name
+                
+                if item['mimeType'] == 'application/vnd.google-apps.folder':
+                    # 子資料夾留待下一層批次展開
+                    next_pending.append((item['id'], current_path, None))
+                elif item_name.endswith('.csv'):
+                    # 找到 CSV 檔案
+                    files_found.append({
+                        'id': item['id'],
+                        'name': item_name,
+                        'path': current_path
+                    })
+            
+            # 超過一頁時繼續讀取下一頁
+            if response.get('nextPageToken'):
+                next_pending.append((listed_id, folder_path, response['nextPageToken']))
+        return callback
+    
+    while pending:
+        next_pending = []
+        
+        for start in range(0, len(pending), DRIVE_BATCH_SIZE):
+            batch = drive_service.new_batch_http_request()
+            for current_id, current_path, page_token in pending[start:start + DRIVE_BATCH_SIZE]:
+                batch.add(
+                    drive_service.files().list(
+                        q=f"'{current_id}' in parents and trashed=false",
+                        spaces='drive',
+                        fields='nextPageToken, files(id, name, mimeType)',
+                        pageSize=1000,
+                        pageToken=page_token
+                    ),
+                    callback=make_callback(current_id, current_path, next_pending)
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                print(f"⚠️ Google Drive 批次請求失敗: {e}")
         
-    except Exception as e:
-        print(f"⚠️ 列出 Google Drive 資料夾失敗 ({path}): {e}")
-        return []
+        pending = next_pending
+    
+    return files_found
 
 # ============ 本地文件系統 ============
 
@@ -393,49 +548,148 @@ async def startup_event():
 
 # ============ 數據庫初始化 ============
 
+# 數據庫結構版本（記錄在 PRAGMA user_version，已是最新版本時跳過遷移）
+SCHEMA_VERSION = 2
+
 def init_database():
-    """初始化數據庫"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # 版本表
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS versions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            week_id TEXT UNIQUE NOT NULL,
-            upload_date TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # CSV 文件索引表（記錄可用的 CSV 文件）
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS csv_index (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            filename TEXT UNIQUE NOT NULL,
-            city TEXT,
-            district TEXT,
-            building_type TEXT,
-            property_category TEXT,
-            week_id TEXT,
-            record_count INTEGER DEFAULT 0,
-            source TEXT DEFAULT 'local',
-            file_id TEXT,
-            last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # 嘗試新增 file_id 欄位（如果表已存在但沒有此欄位）
-    try:
-        cursor.execute("ALTER TABLE csv_index ADD COLUMN file_id TEXT")
-    except:
-        pass  # 欄位已存在
-    
-    conn.commit()
-    conn.close()
+    """初始化數據庫（僅在結構版本落後時執行建表與遷移）"""
+    with get_conn(write=True) as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        # === 版本 1：建立資料表與查詢索引 ===
+        if version < 1:
+            # 版本表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS versions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    week_id TEXT UNIQUE NOT NULL,
+                    upload_date TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # CSV 文件索引表（記錄可用的 CSV 文件）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS csv_index (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    filename TEXT UNIQUE NOT NULL,
+                    city TEXT,
+                    district TEXT,
+                    building_type TEXT,
+                    property_category TEXT,
+                    week_id TEXT,
+                    record_count INTEGER DEFAULT 0,
+                    source TEXT DEFAULT 'local',
+                    file_id TEXT,
+                    last_scanned TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # 舊版數據庫的 csv_index 沒有 file_id 欄位
+            columns = [row['name'] for row in cursor.execute("PRAGMA table_info(csv_index)")]
+            if 'file_id' not in columns:
+                cursor.execute("ALTER TABLE csv_index ADD COLUMN file_id TEXT")
+            
+            # 查詢索引：load_csv_data / get_csv_from_drive 以 district + week_id 篩選，
+            # get_all_week_ids 每次請求都會取 DISTINCT week_id
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_csv_index_district_week ON csv_index(district, week_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_csv_index_week ON csv_index(week_id)")
+        
+        # === 版本 2：load_csv_data 以 district / week_id / building_type / property_category 同時篩選 ===
+        if version < 2:
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_csv_index_filters 
+                ON csv_index(district, week_id, building_type, property_category)
+            """)
+            # 舊的 (district, week_id) 索引是新索引的前綴，已不需要
+            cursor.execute("DROP INDEX IF EXISTS idx_csv_index_district_week")
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+# ============ CSV 讀取 ============
+
+# process_dataframe 會用到的欄位（其餘欄位不解析）
+CSV_USE_COLUMNS = frozenset([
+    '案件編號', '標題', '地址', '租金', '坪數', '坡數', '房型', '樓層',
+    '緯度', '經度', '座標', '週次', '年週'
+])
+
+# 純文字欄位直接以字串讀入，省去型別推斷
+CSV_TEXT_DTYPES = {
+    '標題': 'string',
+    '地址': 'string',
+    '房型': 'string',
+    '樓層': 'string',
+    '座標': 'string',
+}
+
+def count_csv_records(csv_path: str) -> int:
+    """計算 CSV 資料筆數（以 1 MB 區塊計算換行數，不逐行解碼）"""
+    lines = 0
+    last_byte = b'\n'
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last_byte = block[-1:]
+    # 最後一行沒有換行符號時也算一行
+    if last_byte != b'\n':
+        lines += 1
+    return lines - 1  # 扣除標題列
+
+# 已安裝 pyarrow 時改用多執行緒的 pyarrow 解析器（可選）
+try:
+    import pyarrow  # noqa: F401
+    pyarrow_available = True
+except ImportError:
+    pyarrow_available = False
+
+def read_csv_file(csv_path: str) -> pd.DataFrame:
+    """讀取房源 CSV（只載入需要的欄位並指定文字欄位型別）"""
+    if pyarrow_available:
+        try:
+            # pyarrow 解析器不接受函式形式的 usecols，先讀標題列決定實際存在的欄位
+            header = pd.read_csv(csv_path, encoding='utf-8-sig', nrows=0).columns
+            columns = [name for name in header if name in CSV_USE_COLUMNS]
+            # 不傳 dtype：pyarrow 遇到整數欄位空白格會轉型失敗，文字欄位改為讀入後再轉型
+            df = pd.read_csv(
+                csv_path,
+                encoding='utf-8-sig',
+                engine='pyarrow',
+                usecols=columns
+            )
+            text_dtypes = {name: dtype for name, dtype in CSV_TEXT_DTYPES.items() if name in df.columns}
+            return df.astype(text_dtypes) if text_dtypes else df
+        except Exception as e:
+            # 欄位數不一致等 pyarrow 無法處理的檔案，改用 C 解析器（與原本行為相同）
+            print(f"⚠️ pyarrow 讀取失敗，改用 C 解析器 {os.path.basename(csv_path)}: {e}")
+    
+    return pd.read_csv(
+        csv_path,
+        encoding='utf-8-sig',
+        engine='c',
+        usecols=lambda name: name in CSV_USE_COLUMNS,
+        dtype=CSV_TEXT_DTYPES
+    )
 
 # ============ 工具函數 ============
 
+# executemany 每批寫入的筆數
+DB_WRITE_BATCH_SIZE = 1000
+
+def _chunked(seq, n: int):
+    """將序列切成每批 n 筆的列表"""
+    it = iter(seq)
+    while True:
+        chunk = list(islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
 def get_week_id(date: datetime = None) -> str:
     if date is None:
         date = datetime.now()
@@ -453,6 +707,39 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return R * c
 
+def haversine_distance_vector(lat1: float, lon1: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """向量化版本的 haversine_distance，一次計算查詢點到所有座標的距離（公尺）"""
+    R = 6371000
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lats)
+    delta_lat = np.radians(lats - lat1)
+    delta_lon = np.radians(lons - lon1)
+    a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+    return R * c
+
+def bounding_box(lat: float, lon: float, distance: float):
+    """計算距離 (lat, lon) 不超過 distance 公尺的經緯度外接矩形 (min_lat, max_lat, min_lon, max_lon)"""
+    R = 6371000
+    angular = distance / R
+    if angular >= math.pi / 2:
+        # 範圍達四分之一圓周以上，經度公式不再成立，不做預先篩選
+        return -90.0, 90.0, -180.0, 180.0
+    
+    min_lat = max(lat - math.degrees(angular), -90.0)
+    max_lat = min(lat + math.degrees(angular), 90.0)
+    
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat <= 0 or math.sin(angular) >= cos_lat:
+        # 範圍涵蓋極點附近，不限制經度
+        return min_lat, max_lat, -180.0, 180.0
+    
+    delta_lon = math.degrees(math.asin(math.sin(angular) / cos_lat))
+    if lon - delta_lon < -180.0 or lon + delta_lon > 180.0:
+        # 範圍跨越 ±180 度經線，不限制經度
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - delta_lon, lon + delta_lon
+
 def calculate_weeks_since_published(first_published_date: str) -> int:
     if not first_published_date:
         return 0
@@ -465,6 +752,9 @@ def calculate_weeks_since_published(first_published_date: str) -> int:
     except:
         return 0
 
+# 度分秒座標，例如 25°2'37"N
+DMS_PATTERN = re.compile(r"(\d+)°(\d+)'(\d+(?:\.\d+)?)\"([NSEW])")
+
 def parse_dms_coordinate(coord_str: str):
     """解析度分秒格式的座標字串"""
     if not coord_str or coord_str == 'nan':
@@ -472,8 +762,7 @@ def parse_dms_coordinate(coord_str: str):
     
     try:
         coord_str = str(coord_str).strip()
-        pattern = r"(\d+)°(\d+)'(\d+(?:\.\d+)?)\"([NSEW])"
-        matches = re.findall(pattern, coord_str)
+        matches = DMS_PATTERN.findall(coord_str)
         
         if len(matches) >= 2:
             lat_match = None
@@ -503,8 +792,85 @@ def parse_dms_coordinate(coord_str: str):
     
     return 0, 0
 
+def parse_dms_series(coords: pd.Series):
+    """parse_dms_coordinate 的向量化版本，整欄解析度分秒座標
+    
+    回傳 (緯度, 經度) 兩個 Series，無法解析的列為 0
+    """
+    latitude = pd.Series(0.0, index=coords.index)
+    longitude = pd.Series(0.0, index=coords.index)
+    
+    matches = coords.astype(str).str.extractall(DMS_PATTERN.pattern)
+    if matches.empty:
+        return latitude, longitude
+    
+    values = matches[0].astype(float) + matches[1].astype(float)/60 + matches[2].astype(float)/3600
+    values = values.where(~matches[3].isin(['S', 'W']), -values)
+    
+    # 同方向出現多次時以最後一個為準；須同時有南北與東西座標
+    is_lat = matches[3].isin(['N', 'S'])
+    lat_values = values[is_lat].groupby(level=0).last()
+    lng_values = values[~is_lat].groupby(level=0).last()
+    both = lat_values.index.intersection(lng_values.index)
+    latitude[both] = lat_values[both]
+    longitude[both] = lng_values[both]
+    
+    return latitude, longitude
+
+# ============ 檔名解析對照表（模組載入時建立一次）============
+
+# 依優先順序排列：「電梯」涵蓋「電梯大樓」、「套房」涵蓋「獨立套房」、「住家」涵蓋「整層住家」
+BUILDING_TYPE_KEYWORDS = (('電梯', 'building'), ('公寓', 'apartment'))
+PROPERTY_CATEGORY_KEYWORDS = (('套房', '套房'), ('住家', '住家'))
+
+# 區域名稱對照表（包含帶「區」字和不帶「區」字的版本）
+DISTRICT_MAPPING = {
+    # 新北市
+    '板橋': '板橋區', '板橋區': '板橋區',
+    '三重': '三重區', '三重區': '三重區',
+    '中和': '中和區', '中和區': '中和區',
+    '永和': '永和區', '永和區': '永和區',
+    '新莊': '新莊區', '新莊區': '新莊區',
+    '新店': '新店區', '新店區': '新店區',
+    '土城': '土城區', '土城區': '土城區',
+    '蘆洲': '蘆洲區', '蘆洲區': '蘆洲區',
+    '樹林': '樹林區', '樹林區': '樹林區',
+    '汐止': '汐止區', '汐止區': '汐止區',
+    '鶯歌': '鶯歌區', '鶯歌區': '鶯歌區',
+    '三峽': '三峽區', '三峽區': '三峽區',
+    '淡水': '淡水區', '淡水區': '淡水區',
+    '五股': '五股區', '五股區': '五股區',
+    '泰山': '泰山區', '泰山區': '泰山區',
+    '林口': '林口區', '林口區': '林口區',
+    '八里': '八里區', '八里區': '八里區',
+    # 台北市
+    '大安': '大安區', '大安區': '大安區',
+    '信義': '信義區', '信義區': '信義區',
+    '中山': '中山區', '中山區': '中山區',
+    '松山': '松山區', '松山區': '松山區',
+    '南港': '南港區', '南港區': '南港區',
+    '內湖': '內湖區', '內湖區': '內湖區',
+    '北投': '北投區', '北投區': '北投區',
+    '士林': '士林區', '士林區': '士林區',
+    '大同': '大同區', '大同區': '大同區',
+    '中正': '中正區', '中正區': '中正區',
+    '萬華': '萬華區', '萬華區': '萬華區',
+    '文山': '文山區', '文山區': '文山區',
+}
+
+# 依名稱長度排序（優先匹配較長的名稱）
+# 所有區域名稱編譯為單一正規表示式；較長的名稱排在前面，同位置時優先匹配「板橋區」而非「板橋」
+_DISTRICT_PATTERN = re.compile('|'.join(
+    re.escape(name) for name in sorted(DISTRICT_MAPPING, key=len, reverse=True)
+))
+
 def parse_csv_filename(filename: str) -> dict:
-    """解析 CSV 文件名，提取相關信息"""
+    """解析 CSV 文件名，提取相關信息（回傳副本，呼叫端可自行覆寫欄位）"""
+    return dict(_parse_csv_filename_cached(filename))
+
+@lru_cache(maxsize=1024)
+def _parse_csv_filename_cached(filename: str) -> dict:
+    """parse_csv_filename 的實作；結果依檔名快取，不可直接修改"""
     result = {
         'city': '',
         'district': '',
@@ -515,61 +881,18 @@ def parse_csv_filename(filename: str) -> dict:
     
     name = filename.replace('.csv', '')
     
-    week_match = re.search(r'_(\d{4})(?:_merged)?$', name)
-    if week_match:
-        result['week_id'] = week_match.group(1)
-    
-    if '電梯大樓' in filename or '電梯' in filename:
-        result['building_type'] = 'building'
-    elif '公寓' in filename:
-        result['building_type'] = 'apartment'
-    
-    if '套房' in filename or '獨立套房' in filename:
-        result['property_category'] = '套房'
-    elif '住家' in filename or '整層住家' in filename:
-        result['property_category'] = '住家'
-    
-    # 區域名稱對照表（包含帶「區」字和不帶「區」字的版本）
-    district_mapping = {
-        # 新北市
-        '板橋': '板橋區', '板橋區': '板橋區',
-        '三重': '三重區', '三重區': '三重區',
-        '中和': '中和區', '中和區': '中和區',
-        '永和': '永和區', '永和區': '永和區',
-        '新莊': '新莊區', '新莊區': '新莊區',
-        '新店': '新店區', '新店區': '新店區',
-        '土城': '土城區', '土城區': '土城區',
-        '蘆洲': '蘆洲區', '蘆洲區': '蘆洲區',
-        '樹林': '樹林區', '樹林區': '樹林區',
-        '汐止': '汐止區', '汐止區': '汐止區',
-        '鶯歌': '鶯歌區', '鶯歌區': '鶯歌區',
-        '三峽': '三峽區', '三峽區': '三峽區',
-        '淡水': '淡水區', '淡水區': '淡水區',
-        '五股': '五股區', '五股區': '五股區',
-        '泰山': '泰山區', '泰山區': '泰山區',
-        '林口': '林口區', '林口區': '林口區',
-        '八里': '八里區', '八里區': '八里區',
-        # 台北市
-        '大安': '大安區', '大安區': '大安區',
-        '信義': '信義區', '信義區': '信義區',
-        '中山': '中山區', '中山區': '中山區',
-        '松山': '松山區', '松山區': '松山區',
-        '南港': '南港區', '南港區': '南港區',
-        '內湖': '內湖區', '內湖區': '內湖區',
-        '北投': '北投區', '北投區': '北投區',
-        '士林': '士林區', '士林區': '士林區',
-        '大同': '大同區', '大同區': '大同區',
-        '中正': '中正區', '中正區': '中正區',
-        '萬華': '萬華區', '萬華區': '萬華區',
-        '文山': '文山區', '文山區': '文山區',
-    }
+    # 週次為檔名最後一段（可能接 _merged）的 4 位數字，例如 信義公寓住家_2604_merged
+    parts = name.removesuffix('_merged').rsplit('_', 1)
+    if len(parts) == 2 and len(parts[1]) == 4 and parts[1].isdecimal():
+        result['week_id'] = parts[1]
+    
+    result['building_type'] = next((bt for keyword, bt in BUILDING_TYPE_KEYWORDS if keyword in filename), '')
+    result['property_category'] = next((cat for keyword, cat in PROPERTY_CATEGORY_KEYWORDS if keyword in filename), '')
     
-    # 嘗試匹配區域名稱（優先匹配較長的名稱）
-    for short_name, full_name in sorted(district_mapping.items(), key=lambda x: len(x[0]), reverse=True):
-        if short_name in filename:
-            result['district'] = full_name
-            # 不在這裡設定城市，讓後續的路徑解析來設定
-            break
+    # 嘗試匹配區域名稱（不在這裡設定城市，讓後續的路徑解析來設定）
+    district_match = _DISTRICT_PATTERN.search(filename)
+    if district_match:
+        result['district'] = DISTRICT_MAPPING[district_match.group(0)]
     
     if filename.startswith('新北市'):
         result['city'] = '新北市'
@@ -582,40 +905,38 @@ def parse_csv_filename(filename: str) -> dict:
     
     return result
 
+# 掃描時並行計算檔案筆數的執行緒數
+CSV_SCAN_WORKERS = 8
+
 def scan_available_csv_files():
     """掃描 upload 資料夾和 Google Drive 中的 CSV 文件並建立索引"""
     upload_dir = get_upload_dir()
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # 清空舊索引
-    cursor.execute("DELETE FROM csv_index")
-    
     week_ids = set()
     total_files = 0
+    index_rows = []  # 收集索引記錄，最後一次性批次寫入
     
     # === 掃描本地 upload 資料夾 ===
     if os.path.exists(upload_dir):
         csv_files = [f for f in os.listdir(upload_dir) if f.endswith('.csv')]
         print(f"📁 本地掃描到 {len(csv_files)} 個 CSV 檔案")
         
-        for csv_filename in csv_files:
+        def count_records(csv_filename):
+            try:
+                return count_csv_records(os.path.join(upload_dir, csv_filename))
+            except:
+                return 0
+        
+        # 計算筆數需讀取整個檔案，以執行緒並行處理（I/O 為主）
+        with ThreadPoolExecutor(max_workers=CSV_SCAN_WORKERS) as executor:
+            record_counts = list(executor.map(count_records, csv_files))
+        
+        for csv_filename, record_count in zip(csv_files, record_counts):
             try:
                 info = parse_csv_filename(csv_filename)
                 
-                csv_path = os.path.join(upload_dir, csv_filename)
-                try:
-                    record_count = sum(1 for _ in open(csv_path, encoding='utf-8-sig')) - 1
-                except:
-                    record_count = 0
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO csv_index 
-                    (filename, city, district, building_type, property_category, week_id, record_count, source, last_scanned)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (csv_filename, info['city'], info['district'], info['building_type'], 
-                      info['property_category'], info['week_id'], record_count, 'local', datetime.now().isoformat()))
+                index_rows.append((csv_filename, info['city'], info['district'], info['building_type'], 
+                                   info['property_category'], info['week_id'], record_count, 'local', None, datetime.now().isoformat()))
                 
                 if info['week_id']:
                     week_ids.add(info['week_id'])
@@ -672,7 +993,7 @@ def scan_available_csv_files():
                     if os.path.exists(local_path):
                         # 檔案已存在，跳過下載
                         try:
-                            record_count = sum(1 for _ in open(local_path, encoding='utf-8-sig')) - 1
+                            record_count = count_csv_records(local_path)
                         except:
                             record_count = 0
                         skipped_count += 1
@@ -699,12 +1020,8 @@ def scan_available_csv_files():
                             print(f"  ⚠️ 下載失敗: {filename} - {download_error}")
                     
                     # 索引記錄為本地檔案（因為已下載到 upload）
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO csv_index 
-                        (filename, city, district, building_type, property_category, week_id, record_count, source, file_id, last_scanned)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (filename, info['city'], info['district'], info['building_type'], 
-                          info['property_category'], info['week_id'], record_count, 'local', file_id, datetime.now().isoformat()))
+                    index_rows.append((filename, info['city'], info['district'], info['building_type'], 
+                                       info['property_category'], info['week_id'], record_count, 'local', file_id, datetime.now().isoformat()))
                     
                     if info['week_id']:
                         week_ids.add(info['week_id'])
@@ -724,26 +1041,76 @@ def scan_available_csv_files():
     else:
         print(f"ℹ️ Google Drive 未配置或不可用 (available={drive_available}, folder_id={drive_folder_id})")
     
-    # === 更新版本記錄 ===
-    for week_id in week_ids:
+    # === 批次寫入索引（清空舊索引與寫入在同一交易內完成）===
+    with get_conn(write=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM csv_index")
+        for chunk in _chunked(index_rows, DB_WRITE_BATCH_SIZE):
+            cursor.executemany("""
+                INSERT OR REPLACE INTO csv_index 
+                (filename, city, district, building_type, property_category, week_id, record_count, source, file_id, last_scanned)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, chunk)
+        
+        # === 更新版本記錄（直接由索引表推導，並移除已無檔案的週次）===
+        upload_date = datetime.now().strftime("%Y-%m-%d")
         cursor.execute("""
             INSERT OR REPLACE INTO versions (week_id, upload_date)
-            VALUES (?, ?)
-        """, (week_id, datetime.now().strftime("%Y-%m-%d")))
+            SELECT DISTINCT week_id, ? FROM csv_index WHERE week_id != ''
+        """, (upload_date,))
+        cursor.execute("DELETE FROM versions WHERE week_id NOT IN (SELECT week_id FROM csv_index WHERE week_id != '')")
+        
+        # 更新統計資訊讓查詢規劃器選用索引
+        cursor.execute("ANALYZE")
     
-    conn.commit()
-    conn.close()
+    invalidate_analysis_cache()
+    invalidate_property_snapshot()
     
     print(f"✓ 索引建立完成: {total_files} 個文件, {len(week_ids)} 個週次版本")
 
+# 並行解析本地 CSV 的執行緒數（pandas / pyarrow 解析時會釋放 GIL）
+CSV_LOAD_WORKERS = 4
+
+# 共用的解析執行緒池，避免每次載入都重新建立與關閉執行緒
+_csv_load_executor = ThreadPoolExecutor(max_workers=CSV_LOAD_WORKERS, thread_name_prefix='csv-load')
+
+def load_local_csv_file(upload_dir: str, csv_filename: str) -> List[dict]:
+    """載入單一本地 CSV 並轉換為房源列表（檔案未變更時使用快照）"""
+    try:
+        csv_path = os.path.join(upload_dir, csv_filename)
+        
+        # 檔案未變更（修改時間與大小相同）時直接使用快照
+        stat = os.stat(csv_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        properties = get_snapshot_properties(('local', csv_path), signature)
+        if properties is None:
+            df = read_csv_file(csv_path)
+            
+            file_info = parse_csv_filename(csv_filename)
+            
+            properties = process_dataframe(
+                df, 
+                file_info['city'], 
+                file_info['district'], 
+                file_info['building_type'], 
+                file_info['property_category'], 
+                file_info['week_id']
+            )
+            set_snapshot_properties(('local', csv_path), signature, properties)
+        return properties
+    
+    except Exception as e:
+        print(f"  ⚠️ {csv_filename} 讀取失敗: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+
 def load_csv_data(city: str, district: str, building_type: str, property_category: str, week_id: str) -> List[dict]:
     """
     按需載入 CSV 數據
     優先從 Google Drive 載入，次之從本地 upload 資料夾
     """
     upload_dir = get_upload_dir()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     
     query = "SELECT filename FROM csv_index WHERE 1=1"
     params = []
@@ -765,9 +1132,10 @@ def load_csv_data(city: str, district: str, building_type: str, property_categor
         query += " AND week_id = ?"
         params.append(week_id)
     
-    cursor.execute(query, params)
-    csv_files = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        csv_files = [row[0] for row in cursor]
     
     print(f"📂 載入 CSV: district={district}, building={building_type}, category={property_category}, week={week_id}")
     print(f"   找到 {len(csv_files)} 個匹配的 CSV 文件: {csv_files}")
@@ -778,37 +1146,29 @@ def load_csv_data(city: str, district: str, building_type: str, property_categor
     if drive_available and district and week_id:
         print(f"📂 嘗試從 Google Drive 載入: city={city}, district={district}, week={week_id}")
         
-        # 直接使用 get_csv_from_drive，它會自動處理建物類型和房型的篩選
-        df = get_csv_from_drive(city, district, building_type, property_category, week_id)
-        if df is not None:
-            # 從數據庫獲取建物類型和房型資訊
-            properties = process_dataframe(df, city, district, building_type or '全部', property_category or '全部', week_id)
+        # 快照以索引版本為簽章，重新掃描後自動失效
+        snapshot_key = ('google_drive', city, district, building_type, property_category, week_id)
+        properties = get_snapshot_properties(snapshot_key, _data_version)
+        if properties is not None:
             all_properties.extend(properties)
-            print(f"   ✓ 從 Google Drive 載入 {len(properties)} 筆資料")
+            print(f"   ✓ 從快照載入 Google Drive 資料 {len(properties)} 筆")
+        else:
+            # 直接使用 get_csv_from_drive，它會自動處理建物類型和房型的篩選
+            df = get_csv_from_drive(city, district, building_type, property_category, week_id)
+            if df is not None:
+                # 從數據庫獲取建物類型和房型資訊
+                properties = process_dataframe(df, city, district, building_type or '全部', property_category or '全部', week_id)
+                set_snapshot_properties(snapshot_key, _data_version, properties)
+                all_properties.extend(properties)
+                print(f"   ✓ 從 Google Drive 載入 {len(properties)} 筆資料")
     
-    # 如果 Google Drive 沒有數據，從本地載入
-    if not all_properties:
-        for csv_filename in csv_files:
-            try:
-                csv_path = os.path.join(upload_dir, csv_filename)
-                df = pd.read_csv(csv_path, encoding='utf-8-sig')
-                
-                file_info = parse_csv_filename(csv_filename)
-                
-                properties = process_dataframe(
-                    df, 
-                    file_info['city'], 
-                    file_info['district'], 
-                    file_info['building_type'], 
-                    file_info['property_category'], 
-                    file_info['week_id']
-                )
+    # 如果 Google Drive 沒有數據，從本地載入（多個檔案並行解析）
+    if not all_properties and csv_files:
+        if len(csv_files) == 1:
+            all_properties.extend(load_local_csv_file(upload_dir, csv_files[0]))
+        else:
+            for properties in _csv_load_executor.map(lambda name: load_local_csv_file(upload_dir, name), csv_files):
                 all_properties.extend(properties)
-            
-            except Exception as e:
-                print(f"  ⚠️ {csv_filename} 讀取失敗: {e}")
-                import traceback
-                traceback.print_exc()
     
     print(f"   載入完成: {len(all_properties)} 筆房源")
     return all_properties
@@ -816,21 +1176,15 @@ def load_csv_data(city: str, district: str, building_type: str, property_categor
 def get_all_week_ids() -> List[str]:
     """獲取所有可用的週次 ID，按降序排列"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # 修正：過濾空值和無效值
-        cursor.execute("SELECT DISTINCT week_id FROM csv_index WHERE week_id IS NOT NULL AND week_id != '' ORDER BY week_id DESC")
-        week_ids = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            # 修正：過濾空值和無效值
+            cursor.execute("SELECT DISTINCT week_id FROM csv_index WHERE week_id IS NOT NULL AND week_id != '' ORDER BY week_id DESC")
+            week_ids = [row[0] for row in cursor]
         return week_ids
     except:
         return []
 
-def load_property_ids_for_week(city: str, district: str, building_type: str, property_category: str, week_id: str) -> set:
-    """載入指定週次的所有案件編號"""
-    properties = load_csv_data(city, district, building_type, property_category, week_id)
-    return set(p['property_id'] for p in properties if p.get('property_id'))
-
 def calculate_property_status(current_properties: List[dict], city: str, district: str, 
                                building_type: str, property_category: str, current_week_id: str) -> List[dict]:
     """
@@ -854,19 +1208,26 @@ def calculate_property_status(current_properties: List[dict], city: str, distric
     # 獲取歷史週次（最多回溯 10 週）
     history_weeks = all_weeks[current_week_index + 1:current_week_index + 11]
     
-    # 載入歷史週次的案件編號
-    history_property_ids = {}  # {week_id: set of property_ids}
+    # 載入歷史週次的房源（每週只載入一次，上週資料稍後也用於消失案件）
+    history_properties = {}  # {week_id: list of properties}
     for week in history_weeks:
         try:
-            ids = load_property_ids_for_week(city, district, building_type, property_category, week)
-            history_property_ids[week] = ids
+            history_properties[week] = load_csv_data(city, district, building_type, property_category, week)
         except:
-            history_property_ids[week] = set()
+            history_properties[week] = []
+    
+    history_property_ids = {
+        week: set(p['property_id'] for p in props if p.get('property_id'))
+        for week, props in history_properties.items()
+    }
     
-    # 合併所有歷史案件編號
-    all_history_ids = set()
-    for ids in history_property_ids.values():
-        all_history_ids.update(ids)
+    # 預先建立 {案件編號: 出現週數} 與 {案件編號: 首次出現週次} 對照表
+    weeks_seen_map = {}
+    first_seen_map = {}
+    for week in reversed(history_weeks):  # 從最舊的開始檢查
+        for prop_id in history_property_ids[week]:
+            weeks_seen_map[prop_id] = weeks_seen_map.get(prop_id, 0) + 1
+            first_seen_map[prop_id] = week
     
     # 當前週次的案件編號
     current_ids = set(p['property_id'] for p in current_properties if p.get('property_id'))
@@ -875,14 +1236,8 @@ def calculate_property_status(current_properties: List[dict], city: str, distric
     property_dict = {p['property_id']: p for p in current_properties if p.get('property_id')}
     
     for prop_id, prop in property_dict.items():
-        # 檢查這個案件在歷史中出現過幾次
-        weeks_seen = 0
-        first_seen_week = current_week_id
-        
-        for week in reversed(history_weeks):  # 從最舊的開始檢查
-            if prop_id in history_property_ids.get(week, set()):
-                weeks_seen += 1
-                first_seen_week = week
+        weeks_seen = weeks_seen_map.get(prop_id, 0)
+        first_seen_week = first_seen_map.get(prop_id, current_week_id)
         
         if weeks_seen == 0:
             # 新增案件（本週首次出現）
@@ -903,10 +1258,9 @@ def calculate_property_status(current_properties: List[dict], city: str, distric
         last_week_ids = history_property_ids.get(last_week, set())
         disappeared_ids = last_week_ids - current_ids
         
-        # 載入上週的完整資料以獲取消失案件的詳細資訊
+        # 使用已載入的上週資料取得消失案件的詳細資訊
         if disappeared_ids:
-            last_week_properties = load_csv_data(city, district, building_type, property_category, last_week)
-            for prop in last_week_properties:
+            for prop in history_properties.get(last_week, []):
                 if prop.get('property_id') in disappeared_ids:
                     prop['status'] = 'inactive'
                     prop['weeks_active'] = 0
@@ -916,123 +1270,125 @@ def calculate_property_status(current_properties: List[dict], city: str, distric
     return result_properties
 
 def process_dataframe(df: pd.DataFrame, city: str, district: str, building_type: str, property_category: str, week_id: str) -> List[dict]:
-    """處理 DataFrame 並轉換為房源列表"""
-    properties = []
-    
-    for _, row in df.iterrows():
-        property_id = row.get('案件編號', '')
-        if pd.isna(property_id) or not property_id:
-            continue
-        property_id = str(int(property_id) if isinstance(property_id, float) else property_id)
-        
-        title = str(row.get('標題', ''))
-        
-        raw_address = str(row.get('地址', ''))
-        if city and not raw_address.startswith(city):
-            raw_address = city + raw_address
-        if district and district not in raw_address:
-            raw_address = raw_address.replace(city, city + district)
-        address = raw_address
-        
-        rent = row.get('租金', 0)
-        if pd.isna(rent):
-            rent = 0
-        rent = int(rent)
-        
-        area = row.get('坪數', row.get('坡數', 0))
-        if pd.isna(area):
-            area = 0
-        area = float(area)
-        
-        room_type = str(row.get('房型', ''))
-        if room_type == 'nan':
-            room_type = ''
-        
-        floor = str(row.get('樓層', ''))
-        if floor == 'nan':
-            floor = ''
-        
-        building_type_val = building_type or 'unknown'
-        property_category_val = property_category or ''
-        
-        latitude = 0
-        longitude = 0
-        
-        if '緯度' in df.columns and '經度' in df.columns:
-            lat_val = row.get('緯度', 0)
-            lng_val = row.get('經度', 0)
-            if not pd.isna(lat_val) and not pd.isna(lng_val):
-                latitude = float(lat_val)
-                longitude = float(lng_val)
-        
-        if latitude == 0 and longitude == 0 and '座標' in df.columns:
-            coord_str = row.get('座標', '')
-            if not pd.isna(coord_str):
-                latitude, longitude = parse_dms_coordinate(str(coord_str))
-        
-        prop_week_id = row.get('週次', row.get('年週', ''))
-        if pd.isna(prop_week_id) or not prop_week_id:
-            prop_week_id = week_id or get_week_id()
-        prop_week_id = str(prop_week_id)
-        if prop_week_id.endswith('.0'):
-            prop_week_id = prop_week_id[:-2]
-        
-        if not address or rent <= 0:
-            continue
-        
-        properties.append({
-            'property_id': property_id,
-            'title': title,
-            'address': address,
-            'rent_monthly': rent,
-            'area': area,
-            'room_type': room_type,
-            'floor': floor,
-            'latitude': latitude,
-            'longitude': longitude,
-            'building_type': building_type_val,
-            'property_category': property_category_val,
-            'upload_week': prop_week_id,
-            'status': 'active'
-        })
+    """處理 DataFrame 並轉換為房源列表（整欄向量化處理，不逐列迭代）"""
+    if df.empty:
+        return []
     
-    return properties
+    def column(name, default):
+        """取得欄位，不存在時回傳預設值欄位"""
+        if name in df.columns:
+            return df[name]
+        return pd.Series(default, index=df.index)
+    
+    def text_column(name):
+        """轉為字串欄位，缺值轉為空字串"""
+        values = column(name, '')
+        return values.astype(object).where(values.notna(), '').astype(str)
+    
+    # 案件編號：排除空值，浮點數編號轉為整數字串
+    raw_ids = column('案件編號', '')
+    valid = raw_ids.notna() & (raw_ids != '') & (raw_ids != 0)
+    
+    rent = pd.to_numeric(column('租金', 0), errors='coerce').fillna(0).astype('int64')
+    address = text_column('地址')
+    valid &= (address != '') & (rent > 0)
+    
+    df = df[valid]
+    if df.empty:
+        return []
+    raw_ids, rent, address = raw_ids[valid], rent[valid], address[valid]
+    
+    if pd.api.types.is_float_dtype(raw_ids):
+        property_ids = raw_ids.astype('int64').astype(str)
+    else:
+        property_ids = raw_ids.map(lambda v: str(int(v)) if isinstance(v, float) else str(v))
+    
+    # 地址補上城市與區域
+    if city:
+        address = address.where(address.str.startswith(city), city + address)
+    if district:
+        missing_district = ~address.str.contains(district, regex=False)
+        if missing_district.any():
+            address = address.where(~missing_district, address[missing_district].map(lambda a: a.replace(city, city + district)))
+    
+    area_col = '坪數' if '坪數' in df.columns else '坡數'
+    area = pd.to_numeric(column(area_col, 0), errors='coerce').fillna(0).astype('float64')
+    
+    # 座標：優先使用經緯度欄位，否則解析度分秒格式
+    latitude = pd.Series(0.0, index=df.index)
+    longitude = pd.Series(0.0, index=df.index)
+    if '緯度' in df.columns and '經度' in df.columns:
+        lat_vals = pd.to_numeric(df['緯度'], errors='coerce')
+        lng_vals = pd.to_numeric(df['經度'], errors='coerce')
+        has_coords = lat_vals.notna() & lng_vals.notna()
+        latitude = lat_vals.where(has_coords, 0.0)
+        longitude = lng_vals.where(has_coords, 0.0)
+    
+    if '座標' in df.columns:
+        needs_dms = (latitude == 0) & (longitude == 0) & df['座標'].notna()
+        if needs_dms.any():
+            dms_lat, dms_lng = parse_dms_series(df.loc[needs_dms, '座標'])
+            latitude = latitude.astype('float64')
+            longitude = longitude.astype('float64')
+            latitude[needs_dms] = dms_lat
+            longitude[needs_dms] = dms_lng
+    
+    # 週次：優先使用 CSV 內的週次欄位
+    raw_week = column('週次', None) if '週次' in df.columns else column('年週', '')
+    default_week = week_id or get_week_id()
+    missing_week = raw_week.isna() | (raw_week == '') | (raw_week == 0)
+    upload_week = raw_week.astype(str).str.removesuffix('.0').where(~missing_week, default_week)
+    
+    result = pd.DataFrame({
+        'property_id': property_ids,
+        'title': text_column('標題'),
+        'address': address,
+        'rent_monthly': rent,
+        'area': area,
+        'room_type': text_column('房型'),
+        'floor': text_column('樓層'),
+        'latitude': latitude.astype('float64'),
+        'longitude': longitude.astype('float64'),
+        'building_type': building_type or 'unknown',
+        'property_category': property_category or '',
+        'upload_week': upload_week,
+        'status': 'active'
+    })
+    
+    return result.to_dict('records')
 
 # ============ API 端點 ============
 
 @app.get("/api/versions")
-async def get_versions():
+def get_versions():
     """獲取所有可用的週次版本"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT week_id, upload_date FROM versions ORDER BY week_id DESC")
-        versions = [{"week_id": row[0], "upload_date": row[1]} for row in cursor.fetchall()]
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT week_id, upload_date FROM versions ORDER BY week_id DESC")
+            versions = [dict(row) for row in cursor]
         return {"status": "success", "versions": versions, "count": len(versions)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/available-filters")
-async def get_available_filters():
+def get_available_filters():
     """獲取可用的篩選選項（基於現有 CSV 文件）"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT DISTINCT city, district FROM csv_index WHERE district != '' ORDER BY city, district")
-        districts = [{"city": row[0], "district": row[1]} for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT DISTINCT building_type FROM csv_index WHERE building_type != ''")
-        building_types = [row[0] for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT DISTINCT property_category FROM csv_index WHERE property_category != ''")
-        property_categories = [row[0] for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT DISTINCT week_id FROM csv_index WHERE week_id != '' ORDER BY week_id DESC")
-        week_ids = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT DISTINCT city, district FROM csv_index WHERE district != '' ORDER BY city, district")
+            districts = [dict(row) for row in cursor]
+            
+            cursor.execute("SELECT DISTINCT building_type FROM csv_index WHERE building_type != ''")
+            building_types = [row[0] for row in cursor]
+            
+            cursor.execute("SELECT DISTINCT property_category FROM csv_index WHERE property_category != ''")
+            property_categories = [row[0] for row in cursor]
+            
+            cursor.execute("SELECT DISTINCT week_id FROM csv_index WHERE week_id != '' ORDER BY week_id DESC")
+            week_ids = [row[0] for row in cursor]
         
         return {
             "status": "success",
@@ -1047,8 +1403,30 @@ async def get_available_filters():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# 地址中可辨識的區域（模組載入時編譯為單一正規表示式，一次掃描地址）
+ADDRESS_DISTRICTS = (
+    '板橋區', '三重區', '中和區', '永和區', '新莊區', '新店區', '土城區',
+    '蘆洲區', '樹林區', '汐止區', '鶯歌區', '三峽區', '淡水區',
+    '五股區', '泰山區', '林口區', '八里區',
+    '大安區', '信義區', '中山區', '松山區', '南港區', '內湖區'
+)
+ADDRESS_DISTRICT_PATTERN = re.compile('|'.join(map(re.escape, ADDRESS_DISTRICTS)))
+
+TAIPEI_DISTRICTS = frozenset([
+    '中正區', '大同區', '中山區', '松山區', '大安區', '萬華區',
+    '信義區', '士林區', '北投區', '內湖區', '南港區', '文山區'
+])
+
+# 房型篩選條件：房型字串包含任一字元即符合（套房另外接受房型大類為套房者）
+ROOM_TYPE_PATTERNS = {
+    '套房': '套房',
+    '2房': '[2兩]',
+    '3房': '[3三]',
+    '3房以上': '[4-9四五六七八九]',
+}
+
 @app.get("/api/analysis_v4")
-async def analysis_v4(
+def analysis_v4(
     address: str,
     city: Optional[str] = None,
     district: Optional[str] = None,
@@ -1059,9 +1437,14 @@ async def analysis_v4(
     room_type: Optional[str] = None,
     week_id: Optional[str] = None,
     lat: Optional[float] = None,
-    lng: Optional[float] = None
+    lng: Optional[float] = None,
+    fields: Optional[str] = None
 ):
-    """分析 API - 按需載入指定條件的數據"""
+    """分析 API - 按需載入指定條件的數據
+    
+    fields：以逗號分隔的房源欄位（例如 title,latitude,longitude），
+    指定時 properties 只回傳這些欄位以縮小回應
+    """
     try:
         # 修正開始：自動處理 week_id 預設值
         if not week_id:
@@ -1072,6 +1455,12 @@ async def analysis_v4(
             else:
                 week_id = get_week_id()
         # 修正結束
+        
+        cache_key = (_data_version, address, city, district, distance_min, distance_max,
+                     building_type, property_category, room_type, week_id, lat, lng, fields)
+        cached_body = get_cached_analysis(cache_key)
+        if cached_body is not None:
+            return Response(content=cached_body, media_type="application/json")
 
         if lat is not None and lng is not None and lat != 0 and lng != 0:
             query_lat, query_lon = lat, lng
@@ -1079,16 +1468,9 @@ async def analysis_v4(
             query_lat, query_lon = 25.0288, 121.4625
         
         if not district:
-            districts = [
-                '板橋區', '三重區', '中和區', '永和區', '新莊區', '新店區', '土城區',
-                '蘆洲區', '樹林區', '汐止區', '鶯歌區', '三峽區', '淡水區',
-                '五股區', '泰山區', '林口區', '八里區',
-                '大安區', '信義區', '中山區', '松山區', '南港區', '內湖區'
-            ]
-            for d in districts:
-                if d in address:
-                    district = d
-                    break
+            district_match = ADDRESS_DISTRICT_PATTERN.search(address)
+            if district_match:
+                district = district_match.group(0)
         
         load_category = None
         if room_type == '套房':
@@ -1100,8 +1482,7 @@ async def analysis_v4(
         
         # 根據區域自動判斷城市（如果未提供）
         if not city:
-            taipei_districts = ['中正區', '大同區', '中山區', '松山區', '大安區', '萬華區', '信義區', '士林區', '北投區', '內湖區', '南港區', '文山區']
-            if district in taipei_districts:
+            if district in TAIPEI_DISTRICTS:
                 city = '台北市'
             else:
                 city = '新北市'
@@ -1135,58 +1516,67 @@ async def analysis_v4(
                 unique_properties.append(prop)
         all_properties = unique_properties
         
+        # 先以外接矩形排除範圍外的房源，再只對候選房源計算精確距離
+        lats = np.fromiter((p['latitude'] for p in all_properties), dtype=np.float64, count=len(all_properties))
+        lons = np.fromiter((p['longitude'] for p in all_properties), dtype=np.float64, count=len(all_properties))
+        min_lat, max_lat, min_lon, max_lon = bounding_box(query_lat, query_lon, distance_max)
+        candidates = np.flatnonzero(
+            ~((lats == 0) & (lons == 0)) &
+            (lats >= min_lat) & (lats <= max_lat) &
+            (lons >= min_lon) & (lons <= max_lon)
+        )
+        distances = haversine_distance_vector(query_lat, query_lon, lats[candidates], lons[candidates])
+        in_range = (distances >= distance_min) & (distances <= distance_max)
+        
+        candidates, distances = candidates[in_range], distances[in_range]
+        
+        # 房型篩選：對範圍內的房源整欄比對房型字串
+        if room_type in ROOM_TYPE_PATTERNS and len(candidates):
+            room_types = pd.Series([all_properties[i].get('room_type', '') for i in candidates], dtype=object)
+            room_mask = room_types.str.contains(ROOM_TYPE_PATTERNS[room_type], regex=True).to_numpy(dtype=bool)
+            if room_type == '套房':
+                room_mask |= np.array([all_properties[i].get('property_category') == '套房' for i in candidates], dtype=bool)
+            candidates, distances = candidates[room_mask], distances[room_mask]
+        
         filtered_properties = []
-        for prop in all_properties:
-            if prop['latitude'] == 0 and prop['longitude'] == 0:
-                continue
-            
-            distance = haversine_distance(query_lat, query_lon, prop['latitude'], prop['longitude'])
-            
-            if distance_min <= distance <= distance_max:
-                prop['distance'] = distance
-                
-                if room_type and room_type != '全部':
-                    if room_type == '套房':
-                        if prop.get('property_category') != '套房' and '套房' not in prop.get('room_type', ''):
-                            continue
-                    elif room_type == '2房':
-                        if '2' not in prop.get('room_type', '') and '兩' not in prop.get('room_type', ''):
-                            continue
-                    elif room_type == '3房':
-                        if '3' not in prop.get('room_type', '') and '三' not in prop.get('room_type', ''):
-                            continue
-                    elif room_type == '3房以上':
-                        rt = prop.get('room_type', '')
-                        has_large = any(str(n) in rt for n in range(4, 10)) or any(c in rt for c in ['四', '五', '六', '七', '八', '九'])
-                        if not has_large:
-                            continue
-                
-                filtered_properties.append(prop)
+        for i, distance in zip(candidates, distances):
+            prop = all_properties[i]
+            prop['distance'] = float(distance)
+            filtered_properties.append(prop)
         
         # 分類統計
-        new_properties = [p for p in filtered_properties if p.get('status') == 'new']
-        active_properties = [p for p in filtered_properties if p.get('status') == 'active']
-        inactive_properties = [p for p in filtered_properties if p.get('status') == 'inactive']
-        
-        # 計算統計數據（排除消失的案件）
-        available_properties = new_properties + active_properties
-        
-        if available_properties:
-            avg_rent = sum(p['rent_monthly'] for p in available_properties) / len(available_properties)
-            min_rent = min(p['rent_monthly'] for p in available_properties)
-            max_rent = max(p['rent_monthly'] for p in available_properties)
-            avg_area = sum(p['area'] for p in available_properties if p['area'] > 0) / max(1, len([p for p in available_properties if p['area'] > 0]))
+        count = len(filtered_properties)
+        statuses = np.array([p.get('status') or '' for p in filtered_properties], dtype=str)
+        new_idx = np.flatnonzero(statuses == 'new')
+        active_idx = np.flatnonzero(statuses == 'active')
+        inactive_count = int(np.count_nonzero(statuses == 'inactive'))
+        
+        # 計算統計數據（排除消失的案件，以 NumPy 一次彙總）
+        available_idx = np.concatenate([new_idx, active_idx])
+        rents = np.fromiter((p['rent_monthly'] for p in filtered_properties), dtype=np.int64, count=count)[available_idx]
+        areas = np.fromiter((p['area'] for p in filtered_properties), dtype=np.float64, count=count)[available_idx]
+        
+        if available_idx.size:
+            avg_rent = float(rents.mean())
+            min_rent = int(rents.min())
+            max_rent = int(rents.max())
+            positive_areas = areas[areas > 0]
+            avg_area = float(positive_areas.mean()) if positive_areas.size else 0.0
         else:
             avg_rent = min_rent = max_rent = avg_area = 0
         
-        room_type_counts = {}
-        for p in available_properties:
-            rt = p['room_type'] or '未知'
-            room_type_counts[rt] = room_type_counts.get(rt, 0) + 1
+        room_type_counts = Counter(filtered_properties[i]['room_type'] or '未知' for i in available_idx)
         
         room_type_analysis = [{"room_type": rt, "count": count} for rt, count in sorted(room_type_counts.items(), key=lambda x: -x[1])]
         
-        return {
+        # 只回傳前端要求的欄位
+        if fields:
+            keep_fields = [f.strip() for f in fields.split(',') if f.strip()]
+            response_properties = [{f: prop[f] for f in keep_fields if f in prop} for prop in filtered_properties]
+        else:
+            response_properties = filtered_properties
+        
+        response = FastJSONResponse({
             "status": "success",
             "query": {
                 "address": address,
@@ -1199,20 +1589,22 @@ async def analysis_v4(
                 "week_id": week_id or "current"
             },
             "summary": {
-                "total_properties": len(filtered_properties),
-                "available_properties": len(available_properties),
-                "new_properties": len(new_properties),
-                "active_properties": len(active_properties),
-                "inactive_properties": len(inactive_properties),
+                "total_properties": count,
+                "available_properties": int(available_idx.size),
+                "new_properties": int(new_idx.size),
+                "active_properties": int(active_idx.size),
+                "inactive_properties": inactive_count,
                 "avg_rent_all": round(avg_rent),
                 "min_rent": min_rent,
                 "max_rent": max_rent,
                 "avg_area": round(avg_area, 1)
             },
-            "properties": filtered_properties,
+            "properties": response_properties,
             "room_type_analysis": room_type_analysis,
             "data_source": "google_drive" if drive_available else "local"
-        }
+        })
+        set_cached_analysis(cache_key, response.body)
+        return response
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -1222,43 +1614,39 @@ class ResetRequest(BaseModel):
     password: str
 
 @app.post("/api/admin/reset-database")
-async def reset_database(request: ResetRequest):
+def reset_database(request: ResetRequest):
     """重置數據庫並重新掃描 CSV"""
     if request.password != "1234":
         raise HTTPException(status_code=403, detail="密碼錯誤")
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM csv_index")
-        cursor.execute("DELETE FROM versions")
-        conn.commit()
-        conn.close()
+        with get_conn(write=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM csv_index")
+            cursor.execute("DELETE FROM versions")
         scan_available_csv_files()
         return {"status": "success", "message": "數據庫已重置並重新掃描 CSV 文件"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/admin/database-status")
-async def database_status():
+def database_status():
     """獲取數據庫狀態"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM csv_index")
-        csv_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT SUM(record_count) FROM csv_index")
-        total_records = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT week_id, upload_date FROM versions ORDER BY week_id DESC")
-        versions = [{"week_id": row[0], "upload_date": row[1]} for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT filename, city, district, building_type, property_category, week_id, record_count, source, file_id FROM csv_index ORDER BY city, district, building_type, property_category")
-        csv_files = [{"filename": row[0], "city": row[1], "district": row[2], "building_type": row[3], "property_category": row[4], "week_id": row[5], "record_count": row[6], "source": row[7], "file_id": row[8]} for row in cursor.fetchall()]
-        
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM csv_index")
+            csv_count = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT SUM(record_count) FROM csv_index")
+            total_records = cursor.fetchone()[0] or 0
+            
+            cursor.execute("SELECT week_id, upload_date FROM versions ORDER BY week_id DESC")
+            versions = [dict(row) for row in cursor]
+            
+            cursor.execute("SELECT filename, city, district, building_type, property_category, week_id, record_count, source, file_id FROM csv_index ORDER BY city, district, building_type, property_category")
+            csv_files = [dict(row) for row in cursor]
         
         # 加入快取狀態
         cache_stats = get_cache_stats()
@@ -1283,19 +1671,18 @@ async def database_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/admin/rescan-csv")
-async def rescan_csv():
+def rescan_csv():
     """重新掃描 CSV 文件"""
     try:
         scan_available_csv_files()
         
         # 返回掃描結果的詳細資訊
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM csv_index")
-        count = cursor.fetchone()[0]
-        cursor.execute("SELECT DISTINCT city FROM csv_index")
-        cities = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM csv_index")
+            count = cursor.fetchone()[0]
+            cursor.execute("SELECT DISTINCT city FROM csv_index")
+            cities = [row[0] for row in cursor]
         
         return {
             "status": "success", 
@@ -1314,7 +1701,7 @@ async def rescan_csv():
         }
 
 @app.get("/api/admin/drive-status")
-async def get_drive_status():
+def get_drive_status():
     """診斷 Google Drive 連接狀態"""
     result = {
         "drive_available": drive_available,
@@ -1337,7 +1724,7 @@ async def get_drive_status():
     return result
 
 @app.get("/api/admin/test-download")
-async def test_download(city: str = "台北市", district: str = "大安區", week_id: str = "2604"):
+def test_download(city: str = "台北市", district: str = "大安區", week_id: str = "2604"):
     """測試從 Google Drive 下載 CSV 檔案（使用快取）"""
     result = {
         "city": city,
@@ -1356,33 +1743,28 @@ async def test_download(city: str = "台北市", district: str = "大安區", we
         result["city_variants"] = city_variants
         
         # 從數據庫查詢匹配的檔案（支援城市名稱變體）
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        if city_variants:
-            placeholders = ','.join(['?' for _ in city_variants])
-            cursor.execute(f"""
-                SELECT filename, file_id, city, district, building_type, property_category, week_id, source 
-                FROM csv_index 
-                WHERE city IN ({placeholders}) AND district = ? AND week_id = ? 
-                AND source = 'google_drive' AND file_id IS NOT NULL
-            """, city_variants + [district, week_id])
-        else:
-            cursor.execute("""
-                SELECT filename, file_id, city, district, building_type, property_category, week_id, source 
-                FROM csv_index 
-                WHERE district = ? AND week_id = ? 
-                AND source = 'google_drive' AND file_id IS NOT NULL
-            """, [district, week_id])
-        
-        rows = cursor.fetchall()
-        conn.close()
+        with get_conn() as conn:
+            cursor = conn.cursor()
+            
+            if city_variants:
+                placeholders = ','.join(['?' for _ in city_variants])
+                cursor.execute(f"""
+                    SELECT filename, file_id, city, district, building_type, property_category, week_id, source 
+                    FROM csv_index 
+                    WHERE city IN ({placeholders}) AND district = ? AND week_id = ? 
+                    AND source = 'google_drive' AND file_id IS NOT NULL
+                """, city_variants + [district, week_id])
+            else:
+                cursor.execute("""
+                    SELECT filename, file_id, city, district, building_type, property_category, week_id, source 
+                    FROM csv_index 
+                    WHERE district = ? AND week_id = ? 
+                    AND source = 'google_drive' AND file_id IS NOT NULL
+                """, [district, week_id])
+            
+            rows = cursor.fetchall()
         
-        result["query_result"] = [
-            {"filename": r[0], "file_id": r[1], "city": r[2], "district": r[3], 
-             "building_type": r[4], "property_category": r[5], "week_id": r[6], "source": r[7]}
-            for r in rows
-        ]
+        result["query_result"] = [dict(r) for r in rows]
         
         # 嘗試下載第一個檔案（使用快取）
         if rows and drive_available and drive_service:
@@ -1428,20 +1810,24 @@ async def test_download(city: str = "台北市", district: str = "大安區", we
     return result
 
 @app.get("/api/admin/cache-status")
-async def cache_status():
+def cache_status():
     """獲取快取狀態"""
     return {
         "status": "success",
         "cache_dir": CACHE_DIR,
         "cache_expiry_hours": CACHE_EXPIRY_HOURS,
-        "stats": get_cache_stats()
+        "stats": get_cache_stats(),
+        "analysis_cache_entries": len(_analysis_cache),
+        "property_snapshot_entries": len(_property_snapshot)
     }
 
 @app.post("/api/admin/clear-cache")
-async def clear_cache_api():
+def clear_cache_api():
     """清除所有快取"""
     try:
         success = clear_cache()
+        invalidate_analysis_cache()
+        invalidate_property_snapshot()
         return {
             "status": "success" if success else "no_cache",
             "message": "快取已清除" if success else "沒有快取需要清除"
@@ -1450,6 +1836,23 @@ async def clear_cache_api():
         raise HTTPException(status_code=500, detail=str(e))
 
 # 靜態文件服務
+STATIC_MAX_AGE_SECONDS = 3600
+
+class CachedStaticFiles(StaticFiles):
+    """帶 Cache-Control 的靜態文件服務
+    
+    HTML 頁面每次向伺服器以 ETag 驗證（未變更時回 304），
+    其他資源（如 districts_data.json）允許瀏覽器快取一小時
+    """
+    
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if str(full_path).endswith('.html'):
+            response.headers['Cache-Control'] = 'no-cache'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE_SECONDS}'
+        return response
+
 static_dir = os.path.dirname(__file__)
 if os.path.exists(static_dir):
-    app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
\ No newline at end of file
+    app.mount("/", CachedStaticFiles(directory=static_dir, html=True), name="static")
\ No newline at end of file